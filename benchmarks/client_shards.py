@@ -0,0 +1,117 @@
+"""
+Measure IndyClient request throughput with a varying number of client
+event loop shards.
+
+Each server runs in its own process, so that the client side is the
+bottleneck. Reply payloads are padded to exercise response decryption
+and parsing, which is the dominant client-side cost for ledger reads.
+
+    python benchmarks/client_shards.py --shards 1 2 4 --connections 16
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+import base58
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from indy_zmq.keys import create_server_keys  # noqa: E402
+from indy_zmq.shard import ShardedClient  # noqa: E402
+from indy_zmq.transport.server import ZmqServer  # noqa: E402
+from indy_zmq.transport.socket import ZmqSocket  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_server(port: int, curve_keys, reply_size: int):
+    padding = "x" * reply_size
+
+    async def handler(socket: ZmqSocket):
+        while True:
+            msg = await socket.receive()
+            if not msg:
+                break
+            req_id = json.loads(msg)["reqId"]
+            await socket.send(json.dumps({"op": "REQACK", "reqId": req_id}))
+            await socket.send(
+                json.dumps(
+                    {"op": "REPLY", "result": {"reqId": req_id, "data": padding}}
+                )
+            )
+
+    server = ZmqServer(handler, curve_keys)
+    asyncio.run(server.run("127.0.0.1", port))
+
+
+async def bench(shards: int, servers, args) -> float:
+    async with ShardedClient(shards) as client:
+        for idx in range(args.connections):
+            port, verkey = servers[idx % len(servers)]
+            await client.connect(idx, "127.0.0.1", port, verkey)
+
+        next_id = 0
+        per_conn = args.requests // args.connections
+
+        async def worker(key: int, count: int):
+            nonlocal next_id
+            for _ in range(count):
+                next_id += 1
+                await client.request(key, {"reqId": next_id, "operation": {}})
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                worker(key, per_conn // args.depth)
+                for key in range(args.connections)
+                for _ in range(args.depth)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        return (per_conn // args.depth) * args.depth * args.connections / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--servers", type=int, default=4)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--reply-size", type=int, default=16384)
+    args = parser.parse_args()
+
+    servers = []
+    procs = []
+    for _ in range(args.servers):
+        (verkey, _), curve_keys = create_server_keys()
+        port = free_port()
+        proc = multiprocessing.Process(
+            target=run_server, args=(port, curve_keys, args.reply_size), daemon=True
+        )
+        proc.start()
+        procs.append(proc)
+        servers.append((port, base58.b58encode(verkey).decode("ascii")))
+    time.sleep(0.5)
+
+    try:
+        for shards in args.shards:
+            rate = asyncio.run(bench(shards, servers, args))
+            print(f"shards={shards}: {rate:.0f} req/s")
+    finally:
+        for proc in procs:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
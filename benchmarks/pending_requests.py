@@ -0,0 +1,90 @@
+"""
+Measure the memory and completion throughput of the IndyClient
+pending-request table with a large number of outstanding requests.
+
+Modes:
+  callback: completion is delivered to a callback, no waiter is created
+  awaited:  each response is awaited by its own task, as a caller would
+
+    python benchmarks/pending_requests.py --counts 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from indy_zmq.client import IndyClientResponse  # noqa: E402
+
+
+def on_complete(response: IndyClientResponse):
+    pass
+
+
+async def fill(count: int, mode: str):
+    pending = {}
+    tasks = []
+    if mode == "callback":
+        for req_id in range(count):
+            pending[req_id] = IndyClientResponse(req_id, on_complete)
+    else:
+        for req_id in range(count):
+            response = pending[req_id] = IndyClientResponse(req_id)
+            tasks.append(asyncio.ensure_future(response.result()))
+        # let each waiter start awaiting its response
+        await asyncio.sleep(0)
+    return pending, tasks
+
+
+async def complete(pending: dict, tasks: list):
+    for req_id in range(len(pending)):
+        response = pending.pop(req_id)
+        response.set_acked()
+        response.set_result({"reqId": req_id})
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def measure_memory(count: int, mode: str) -> float:
+    gc.collect()
+    tracemalloc.start()
+    pending, tasks = await fill(count, mode)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    await complete(pending, tasks)
+    return used / count
+
+
+async def measure_rate(count: int, mode: str) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    pending, tasks = await fill(count, mode)
+    await complete(pending, tasks)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--counts", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--modes", nargs="+", default=["callback", "awaited"])
+    args = parser.parse_args()
+
+    for count in args.counts:
+        for mode in args.modes:
+            per_req = asyncio.run(measure_memory(count, mode))
+            rate = asyncio.run(measure_rate(count, mode))
+            print(
+                f"{count:>8} {mode:<8} {per_req:>7.0f} bytes/request"
+                f" {rate:>10.0f} requests/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
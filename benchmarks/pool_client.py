@@ -0,0 +1,100 @@
+"""
+Measure client latency against a simulated pool with injected latency
+and faults. Each request is sent to every node and completes once f + 1
+replies have been received, as a client would for a consistent read.
+
+    python benchmarks/pool_client.py --nodes 4 --requests 2000 --timeout 2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from indy_zmq.client import IndyClient  # noqa: E402
+from indy_zmq.simulate import NodeBehavior, SimulatedPool  # noqa: E402
+from indy_zmq.trace import LatencyHistogram  # noqa: E402
+
+
+async def pool_request(clients, req_id: int, needed: int, timeout: float) -> bool:
+    message = {"reqId": req_id, "identifier": "LibindyDid111111111111"}
+    responses = await asyncio.gather(
+        *(client.request(dict(message, operation={"type": "3"})) for client in clients)
+    )
+    pending = {asyncio.ensure_future(response.result()) for response in responses}
+    replies = 0
+    try:
+        deadline = time.perf_counter() + timeout
+        while pending and replies < needed:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=deadline - time.perf_counter(),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            replies += sum(1 for task in done if not task.exception())
+    finally:
+        for task in pending:
+            task.cancel()
+    return replies >= needed
+
+
+async def bench(args):
+    behavior = NodeBehavior(
+        ack_latency=["exponential", 0.002],
+        latency=["lognormal", args.median, args.sigma],
+        reqnack_rate=args.reqnack_rate,
+        drop_rate=args.drop_rate,
+        reply_size=args.reply_size,
+    )
+    async with SimulatedPool(args.nodes, behavior, seed=1) as pool:
+        clients = [IndyClient(node.host, node.port, node.dest) for node in pool.nodes]
+        for client in clients:
+            await client.__aenter__()
+        needed = (args.nodes - 1) // 3 + 1
+        latency = LatencyHistogram()
+        failed = 0
+        limit = asyncio.Semaphore(args.concurrency)
+
+        async def one(req_id: int):
+            nonlocal failed
+            async with limit:
+                start = time.perf_counter()
+                if await pool_request(clients, req_id, needed, args.timeout):
+                    latency.add(time.perf_counter() - start)
+                else:
+                    failed += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(req_id) for req_id in range(1, args.requests + 1)))
+        elapsed = time.perf_counter() - start
+        for client in clients:
+            await client.__aexit__(None, None, None)
+
+    print(f"{args.requests} pool requests in {elapsed:.2f}s, {failed} failed")
+    for q in (0.5, 0.9, 0.99):
+        print(f"p{int(q * 100)} <= {latency.quantile(q) * 1000:.1f} ms")
+    for node, stats in pool.stats.items():
+        print(node, stats)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--median", type=float, default=0.02)
+    parser.add_argument("--sigma", type=float, default=0.8)
+    parser.add_argument("--reqnack-rate", type=float, default=0.01)
+    parser.add_argument("--drop-rate", type=float, default=0.01)
+    parser.add_argument("--reply-size", type=int, default=0)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
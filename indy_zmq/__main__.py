@@ -1,12 +1,20 @@
 import asyncio
 import json
+import os
 import sys
 
+from concurrent.futures import ProcessPoolExecutor
+
 import base58
 
 
-from .client import IndyClient
+from .capture import capture_files, replay
+from .client import IndyClient, verkey_to_pk
 from .keys import create_server_keys
+from .simulate import NodeBehavior, SimulatedPool
+from .transport.client import ZmqClient
+from .transport.dispatch import MessageDispatcher
+from .transport.scheduler import FairScheduler, Lane
 from .transport.server import ZmqServer
 from .transport.socket import ZmqSocket
 
@@ -34,6 +42,63 @@ async def test_server_handler(socket: ZmqSocket):
         await socket.send(json.dumps({"op": "REPLY", "result": {"reqId": req_id}}))
 
 
+async def replay_capture(
+    host: str, port: int, verkey: str, paths: list, speed: float, connections: int
+):
+    client = ZmqClient()
+    curve_pk = verkey_to_pk(base58.b58decode(verkey))
+    stats = await replay(
+        paths,
+        lambda: client.connect(host, port, curve_pk),
+        speed=speed,
+        connections=connections,
+    )
+    print(
+        f"sent {stats['sent']}, received {stats['received']}"
+        f" in {stats['elapsed']:.3f}s"
+        f" ({stats['sent'] / max(stats['elapsed'], 1e-9):.0f} req/s)"
+    )
+    if stats["failed"]:
+        print(f"failed {stats['failed']}")
+    for error in stats["errors"]:
+        print("error:", error)
+
+
+async def run_simulated_pool(pool: SimulatedPool, genesis_path: str):
+    async with pool:
+        with open(genesis_path, "w") as genesis:
+            genesis.write(pool.genesis() + "\n")
+        for node in pool.nodes:
+            print(f"{node.name}: {node.host} {node.port} {node.dest}")
+        print("genesis transactions written to:", genesis_path)
+        await asyncio.Event().wait()
+
+
+def test_dispatch_handler(message: bytes) -> list:
+    msg = json.loads(message)
+    req_id = msg.get("reqId", 1)
+    return [
+        json.dumps({"op": "REQACK", "reqId": req_id}),
+        json.dumps({"op": "REPLY", "result": {"reqId": req_id}}),
+    ]
+
+
+# ledger read request types, which are served ahead of writes
+READ_REQUEST_TYPES = {"3", "6", "7", "104", "105", "107", "108", "115", "116", "117"}
+
+
+def test_classify_request(message: bytes) -> str:
+    try:
+        txn_type = json.loads(message)["operation"]["type"]
+    except (ValueError, KeyError, TypeError):
+        return "write"
+    return "read" if str(txn_type) in READ_REQUEST_TYPES else "write"
+
+
+async def test_scheduled_handler(message: bytes) -> list:
+    return test_dispatch_handler(message)
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         raise SystemExit("Missing required arguments (action)")
@@ -52,5 +117,58 @@ if __name__ == "__main__":
         print("server ident:", base58.b58encode(ident_pk).decode("ascii"))
         server = ZmqServer(test_server_handler, curve_keys)
         asyncio.run(server.run(host, port))
+    elif action == "dispatch":
+        if len(sys.argv) < 4:
+            raise SystemExit("Missing required arguments (host, port)")
+        (host, port) = sys.argv[2:4]
+        workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        (ident_pk, _), curve_keys = create_server_keys()
+        print("server ident:", base58.b58encode(ident_pk).decode("ascii"))
+        with ProcessPoolExecutor(workers) as executor:
+            dispatcher = MessageDispatcher(test_dispatch_handler, executor=executor)
+            server = ZmqServer(dispatcher, curve_keys)
+            asyncio.run(server.run(host, port))
+    elif action == "schedule":
+        if len(sys.argv) < 4:
+            raise SystemExit("Missing required arguments (host, port)")
+        (host, port) = sys.argv[2:4]
+        (ident_pk, _), curve_keys = create_server_keys()
+        print("server ident:", base58.b58encode(ident_pk).decode("ascii"))
+        scheduler = FairScheduler(
+            test_scheduled_handler,
+            lanes=[Lane("read", 48), Lane("write", 16)],
+            classify=test_classify_request,
+        )
+        server = ZmqServer(scheduler, curve_keys)
+        asyncio.run(server.run(host, port))
+    elif action == "pool":
+        if len(sys.argv) < 4:
+            raise SystemExit("Missing required arguments (node count, genesis path)")
+        count, genesis_path = int(sys.argv[2]), sys.argv[3]
+        behaviors = None
+        if len(sys.argv) > 4:
+            with open(sys.argv[4]) as config_file:
+                config = json.load(config_file)
+            if isinstance(config, list):
+                behaviors = [NodeBehavior.from_config(c) for c in config]
+            else:
+                behaviors = NodeBehavior.from_config(config)
+        pool = SimulatedPool(count, behaviors, base_port=9700)
+        asyncio.run(run_simulated_pool(pool, genesis_path))
+    elif action == "replay":
+        if len(sys.argv) < 6:
+            raise SystemExit(
+                "Missing required arguments (host, port, verkey, capture path)"
+            )
+        (host, port, verkey, path) = sys.argv[2:6]
+        paths = [path] if os.path.isfile(path) else capture_files(path)
+        if not paths:
+            raise SystemExit(f"No capture files found for {path}")
+        speed = sys.argv[6] if len(sys.argv) > 6 else "1"
+        speed = 0 if speed == "max" else float(speed)
+        connections = int(sys.argv[7]) if len(sys.argv) > 7 else 1
+        asyncio.run(
+            replay_capture(host, int(port), verkey, paths, speed, connections)
+        )
     else:
         raise SystemExit(f"Unsupported action {action}")
@@ -0,0 +1,260 @@
+import asyncio
+import glob
+import mmap
+import struct
+import time
+
+from typing import Awaitable, Callable, Iterator, List, Sequence, Tuple
+
+from .transport.error import ZmqError
+from .transport.socket import ZmqSocket
+
+# capture segment layout: magic, then records of (timestamp, length, payload)
+CAPTURE_MAGIC = b"IZCAP01\n"
+RECORD_HEADER = struct.Struct("<dI")
+
+
+def capture_files(path: str) -> List[str]:
+    """List the segments written by a TrafficRecorder for `path`, in order."""
+    return sorted(glob.glob(glob.escape(path) + ".[0-9][0-9][0-9][0-9]*"))
+
+
+class TrafficRecorder:
+    """Append decrypted request payloads to size-rotated capture segments.
+
+    Records are buffered and written in batches of at least `batch_size`
+    bytes, or once they have been buffered for `flush_interval` seconds (by a
+    timer on the running event loop, when recording from within one). A new
+    segment is started once the current one would exceed `max_size`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_size: int = 64 << 20,
+        batch_size: int = 64 << 10,
+        flush_interval: float = 1.0,
+    ):
+        self.path = path
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = bytearray()
+        self._file = None
+        self._file_size = 0
+        self._flushed = time.monotonic()
+        self._timer: asyncio.TimerHandle = None
+        existing = capture_files(path)
+        self._index = int(existing[-1].rsplit(".", 1)[1]) if existing else 0
+
+    def record(self, message: bytes):
+        self._buffer += RECORD_HEADER.pack(time.time(), len(message))
+        self._buffer += message
+        if (
+            len(self._buffer) >= self.batch_size
+            or time.monotonic() - self._flushed >= self.flush_interval
+        ):
+            self.flush()
+        elif not self._timer:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._timer = loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        self._flushed = time.monotonic()
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        if not self._file or (
+            self._file_size > len(CAPTURE_MAGIC)
+            and self._file_size + len(self._buffer) > self.max_size
+        ):
+            self._rotate()
+        self._file.write(self._buffer)
+        self._file.flush()
+        self._file_size += len(self._buffer)
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        if self._file:
+            self._file.close()
+        self._index += 1
+        self._file = open(f"{self.path}.{self._index:04d}", "xb")
+        self._file.write(CAPTURE_MAGIC)
+        self._file_size = len(CAPTURE_MAGIC)
+
+    def __enter__(self) -> "TrafficRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CaptureReader:
+    """Memory-map a capture segment and iterate over its records.
+
+    Yielded payloads are views of the mapping and must be released before
+    the reader is closed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            self._map = None
+        if self._map and self._map[: len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+            self.close()
+            raise ZmqError(f"invalid capture file: {path}")
+
+    def __iter__(self) -> Iterator[Tuple[float, memoryview]]:
+        mm = self._map
+        if not mm:
+            return
+        size = len(mm)
+        pos = len(CAPTURE_MAGIC)
+        while pos + RECORD_HEADER.size <= size:
+            ts, length = RECORD_HEADER.unpack_from(mm, pos)
+            pos += RECORD_HEADER.size
+            if pos + length > size:
+                # truncated final record
+                break
+            yield ts, memoryview(mm)[pos : pos + length]
+            pos += length
+
+    def close(self):
+        if self._map:
+            try:
+                self._map.close()
+            except BufferError:
+                # payload views are still held, leave the mapping to be collected
+                pass
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+async def replay(
+    paths: Sequence[str],
+    connect: Callable[[], Awaitable[ZmqSocket]],
+    *,
+    speed: float = 1.0,
+    connections: int = 1,
+    queue_size: int = 1000,
+    linger: float = 1.0,
+) -> dict:
+    """Resend captured requests over `connections` sockets.
+
+    Records are distributed round-robin across the connections. With a
+    `speed` of 1.0 the original spacing is reproduced, larger values replay
+    proportionally faster, and a `speed` of None or 0 sends as fast as
+    possible. Replies are read and discarded, and after sending completes the
+    connections are held open until no reply has arrived for `linger` seconds.
+
+    If a connection fails, the records assigned to it are counted as
+    `failed` and the error is added to `errors`; the replay stops early once
+    every connection has failed.
+    """
+    sockets = [await connect() for _ in range(connections)]
+    queues = [asyncio.Queue(queue_size) for _ in sockets]
+    stats = {"sent": 0, "received": 0, "failed": 0, "errors": []}
+    failed = set()
+    closing = False
+
+    async def send_loop(idx: int, socket: ZmqSocket, queue: asyncio.Queue):
+        while True:
+            message = await queue.get()
+            if message is None:
+                break
+            try:
+                if idx in failed:
+                    stats["failed"] += 1
+                    continue
+                try:
+                    await socket.send(message)
+                    stats["sent"] += 1
+                except (ZmqError, OSError) as ex:
+                    # keep draining this queue so that replay does not stall
+                    failed.add(idx)
+                    stats["failed"] += 1
+                    stats["errors"].append(f"connection {idx} send: {ex!r}")
+            finally:
+                message.release()
+                queue.task_done()
+
+    async def receive_loop(idx: int, socket: ZmqSocket):
+        try:
+            while await socket.receive_view() is not None:
+                stats["received"] += 1
+        except (ZmqError, OSError) as ex:
+            if not closing:
+                stats["errors"].append(f"connection {idx} receive: {ex!r}")
+
+    senders = [
+        asyncio.create_task(send_loop(idx, socket, queue))
+        for idx, (socket, queue) in enumerate(zip(sockets, queues))
+    ]
+    receivers = [
+        asyncio.create_task(receive_loop(idx, socket))
+        for idx, socket in enumerate(sockets)
+    ]
+    start = time.perf_counter()
+    try:
+        idx = 0
+        first_ts = None
+        for path in paths:
+            with CaptureReader(path) as reader:
+                for ts, message in reader:
+                    if len(failed) == len(queues):
+                        break
+                    if speed:
+                        if first_ts is None:
+                            first_ts = ts
+                        delay = (ts - first_ts) / speed - (time.perf_counter() - start)
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    await queues[idx].put(message)
+                    idx = (idx + 1) % len(queues)
+                    del message
+                # wait for all payloads from this mapping to be sent
+                await asyncio.gather(*(queue.join() for queue in queues))
+            if len(failed) == len(queues):
+                break
+        for queue in queues:
+            await queue.put(None)
+        await asyncio.gather(*senders)
+        stats["elapsed"] = time.perf_counter() - start
+        while linger and len(failed) < len(queues):
+            received = stats["received"]
+            await asyncio.wait(receivers, timeout=linger)
+            if stats["received"] == received:
+                break
+    finally:
+        closing = True
+        for task in senders:
+            task.cancel()
+        for socket in sockets:
+            try:
+                await socket.close()
+            except (ZmqError, OSError):
+                pass
+        await asyncio.gather(*receivers, return_exceptions=True)
+    return stats
@@ -1,15 +1,18 @@
 import asyncio
 import json
 
-from typing import Union
+from time import perf_counter
+from typing import Callable, Union
 
 import base58
 
 import libnacl as nacl
 
+from .capture import TrafficRecorder
 from .transport.client import ZmqClient
 from .transport.error import ConnectionError
 from .transport.socket import ZmqSocket
+from .trace import ClientLatency
 
 
 def verkey_to_pk(verkey):
@@ -18,7 +21,14 @@ def verkey_to_pk(verkey):
 
 class IndyClient:
     def __init__(
-        self, host: str, port: Union[int, str], dest_pk: str, client_keypair=None
+        self,
+        host: str,
+        port: Union[int, str],
+        dest_pk: str,
+        client_keypair=None,
+        *,
+        trace_handler: Callable[["IndyClientResponse"], None] = None,
+        recorder: TrafficRecorder = None,
     ):
         if isinstance(port, str):
             port = int(port)
@@ -29,11 +39,15 @@ class IndyClient:
         self._pending = {}
         self._polling: asyncio.Task = None
         self._socket: ZmqSocket = None
+        self._trace_handler = trace_handler
+        self._recorder = recorder
+        self.latency = ClientLatency()
 
     async def _connect(self) -> "IndyClient":
         self._socket = await self._client.connect(
             self._host, self._port, self._curve_pk
         )
+        self._socket.recorder = self._recorder
         self._polling = asyncio.create_task(self._poll())
         return self
 
@@ -48,18 +62,34 @@ class IndyClient:
             socket = self._socket
             self._socket = None
             await socket.close()
+        if self._recorder:
+            self._recorder.flush()
 
-    async def request(self, message: dict) -> "IndyClientResponse":
+    async def request(
+        self,
+        message: dict,
+        callback: Callable[["IndyClientResponse"], None] = None,
+    ) -> "IndyClientResponse":
+        """Send a request and return its pending response.
+
+        When `callback` is provided it is invoked with the response upon
+        completion, and no waiter is allocated unless `result()` is awaited.
+        """
         if not self._socket:
             raise ConnectionError("not connected")
         if not message or "reqId" not in message:
             raise ConnectionError("missing reqId for request")
         if message["reqId"] in self._pending:
             raise ConnectionError("duplicate reqId")
-        response = IndyClientResponse(message["reqId"])
+        response = IndyClientResponse(message["reqId"], callback)
         self._pending[message["reqId"]] = response
         message = json.dumps(message).encode("utf-8")
-        await self._socket.send(message)
+        socket = self._socket
+        await socket.drain()
+        socket.write(message)
+        # timestamp once the frame is handed to the transport, as a reply may
+        # arrive before the transport has finished sending it
+        response.sent_at = perf_counter()
         return response
 
     @property
@@ -87,6 +117,7 @@ class IndyClient:
                     pending = self._pending.pop(response["reqId"], None)
                     if pending:
                         pending.set_exception(ConnectionError(response.get("reason")))
+                        self._complete(pending)
                     else:
                         raise ConnectionError(response.get("reason"))
                 elif op == "REPLY" and "result" in response:
@@ -96,6 +127,7 @@ class IndyClient:
                     pending = self._pending.pop(result["reqId"], None)
                     if pending:
                         pending.set_result(result)
+                        self._complete(pending)
                     else:
                         raise ConnectionError("invalid response")
                 else:
@@ -103,28 +135,71 @@ class IndyClient:
         except ConnectionError as ex:
             for message in self._pending.values():
                 message.set_exception(ex)
+                self._complete(message)
             self._pending.clear()
         finally:
             for message in self._pending.values():
                 message.set_exception(ConnectionError("disconnected"))
+                self._complete(message)
             self._pending.clear()
+            if self._recorder:
+                self._recorder.flush()
             if self._socket:
-                await self._socket.close()
+                socket = self._socket
                 self._socket = None
+                await socket.close()
+
+    def _complete(self, response: "IndyClientResponse"):
+        self.latency.record(response)
+        if self._trace_handler:
+            try:
+                self._trace_handler(response)
+            except Exception as ex:
+                print("trace handler error:", ex)
 
 
 class IndyClientResponse:
-    def __init__(self, reqId: int):
+    __slots__ = (
+        "reqId",
+        "callback",
+        "_body",
+        "_exception",
+        "_status",
+        "_waiters",
+        "enqueued_at",
+        "sent_at",
+        "acked_at",
+        "completed_at",
+    )
+
+    def __init__(
+        self, reqId: int, callback: Callable[["IndyClientResponse"], None] = None
+    ):
         self.reqId = reqId
+        self.callback = callback
         self._body: dict = None
-        self._complete: bool = False
         self._exception: Exception = None
         self._status = "sent"
-        self._waiter = asyncio.Event()
+        # a future per waiting result() call, or a list when there are several
+        self._waiters: Union[asyncio.Future, list] = None
+        # perf_counter() timestamps for each lifecycle phase
+        self.enqueued_at: float = perf_counter()
+        self.sent_at: float = None
+        self.acked_at: float = None
+        self.completed_at: float = None
 
     async def result(self) -> dict:
-        if not self._complete:
-            await self._waiter.wait()
+        if self.completed_at is None:
+            # each waiter has its own future, so that cancelling one waiter
+            # does not affect the others
+            waiter = asyncio.get_running_loop().create_future()
+            if self._waiters is None:
+                self._waiters = waiter
+            elif isinstance(self._waiters, list):
+                self._waiters.append(waiter)
+            else:
+                self._waiters = [self._waiters, waiter]
+            await waiter
         if self._exception:
             raise self._exception
         return self._body
@@ -133,15 +208,52 @@ class IndyClientResponse:
         return self._exception
 
     def is_complete(self) -> bool:
-        return self._complete
+        return self.completed_at is not None
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def timings(self) -> dict:
+        """Return the elapsed time (in seconds) of each completed phase."""
+        result = {}
+        if self.sent_at is not None:
+            result["queue"] = max(self.sent_at - self.enqueued_at, 0.0)
+            if self.acked_at is not None:
+                result["ack"] = max(self.acked_at - self.sent_at, 0.0)
+                if self.completed_at is not None:
+                    result["reply"] = max(self.completed_at - self.acked_at, 0.0)
+        if self.completed_at is not None:
+            result["total"] = self.completed_at - self.enqueued_at
+        return result
 
     def set_acked(self):
+        self.acked_at = perf_counter()
         self._status = "acked"
 
     def set_exception(self, exception: Exception):
         self._exception = exception
-        self._waiter.set()
+        self._status = "failed"
+        self._finish()
 
     def set_result(self, result: dict):
         self._body = result
-        self._waiter.set()
+        self._status = "replied"
+        self._finish()
+
+    def _finish(self):
+        self.completed_at = perf_counter()
+        waiters = self._waiters
+        if waiters is not None:
+            self._waiters = None
+            if not isinstance(waiters, list):
+                waiters = (waiters,)
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+        if self.callback:
+            try:
+                self.callback(self)
+            except Exception as ex:
+                print("response callback error:", ex)
@@ -0,0 +1,226 @@
+import asyncio
+import os
+import threading
+import weakref
+
+from collections import deque
+from typing import Callable, Coroutine, Dict, Hashable, List, Tuple, Union
+
+from .client import IndyClient
+from .transport.error import ConnectionError
+
+
+class _Handoff:
+    """Run callbacks on an event loop from other threads.
+
+    Callbacks are queued and a single wakeup is scheduled for each batch,
+    rather than one `call_soon_threadsafe` per callback.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self._queue = deque()
+        self._scheduled = False
+
+    def put(self, callback: Callable, *args):
+        self._queue.append((callback, args))
+        if not self._scheduled:
+            self._scheduled = True
+            self.loop.call_soon_threadsafe(self._drain)
+
+    def _drain(self):
+        self._scheduled = False
+        queue = self._queue
+        while queue:
+            callback, args = queue.popleft()
+            callback(*args)
+
+
+class _ShardCall:
+    """A coroutine submitted to a shard, and the task running it."""
+
+    __slots__ = ("shard", "coro", "done", "task")
+
+    def __init__(self, shard: "ClientShard", coro: Coroutine, done: Callable):
+        self.shard = shard
+        self.coro = coro
+        self.done = done
+        self.task: asyncio.Task = None
+
+    def cancel(self):
+        """Cancel the task on the shard loop. May be called from any thread."""
+        if not self.shard.loop.is_closed():
+            self.shard._inbound.put(self._cancel)
+
+    def _start(self):
+        self.task = self.shard.loop.create_task(self.coro)
+        self.task.add_done_callback(self.done)
+        self.coro = None
+
+    def _cancel(self):
+        # calls are started in submission order, so the task exists by now
+        self.task.cancel()
+
+
+class ClientShard:
+    """An event loop running on its own thread which owns a set of clients."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.clients = 0
+        self.loop = asyncio.new_event_loop()
+        self._inbound = _Handoff(self.loop)
+        self._thread = threading.Thread(
+            target=self._run, name=f"indy-client-shard-{index}", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        if self._thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+        self.loop.close()
+
+    def submit(
+        self, coro: Coroutine, done: Callable[[asyncio.Future], None]
+    ) -> _ShardCall:
+        """Run `coro` on this shard, then pass the finished task to `done`."""
+        call = _ShardCall(self, coro, done)
+        self._inbound.put(call._start)
+        return call
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+
+
+class ShardedClient:
+    """Spread IndyClient connections across several event loop threads.
+
+    Each connection is owned by one shard, and all encryption, decryption
+    and response parsing for it runs on that shard's loop. `request` may be
+    called from any event loop; the request is handed off to the owning
+    shard and the result is returned on the caller's loop.
+    """
+
+    def __init__(self, shards: int = None):
+        self._shards = [ClientShard(idx) for idx in range(shards or os.cpu_count())]
+        self._clients: Dict[Hashable, Tuple[ClientShard, IndyClient]] = {}
+        self._outbound: Dict[
+            asyncio.AbstractEventLoop, _Handoff
+        ] = weakref.WeakKeyDictionary()
+        self._started = False
+
+    @property
+    def shards(self) -> List[ClientShard]:
+        return self._shards
+
+    def start(self):
+        if not self._started:
+            for shard in self._shards:
+                shard.start()
+            self._started = True
+
+    async def connect(
+        self,
+        key: Hashable,
+        host: str,
+        port: Union[int, str],
+        dest_pk: str,
+        **kwargs,
+    ) -> ClientShard:
+        if key in self._clients:
+            raise ConnectionError("duplicate client key")
+        self.start()
+        shard = min(self._shards, key=lambda s: s.clients)
+        shard.clients += 1
+        client = IndyClient(host, port, dest_pk, **kwargs)
+        self._clients[key] = (shard, client)
+        try:
+            await self._call(shard, client.__aenter__())
+        except BaseException:
+            del self._clients[key]
+            shard.clients -= 1
+            raise
+        return shard
+
+    async def disconnect(self, key: Hashable):
+        shard, client = self._clients.pop(key)
+        shard.clients -= 1
+        await self._call(shard, client.__aexit__(None, None, None))
+
+    async def request(self, key: Hashable, message: dict) -> dict:
+        entry = self._clients.get(key)
+        if not entry:
+            raise ConnectionError("unknown client key")
+        shard, client = entry
+        return await self._call(shard, _request(client, message))
+
+    async def close(self):
+        for key in list(self._clients):
+            try:
+                await self.disconnect(key)
+            except Exception:
+                pass
+        # join the shard threads without blocking this event loop
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(None, shard.stop) for shard in self._shards)
+        )
+        self._started = False
+
+    async def __aenter__(self) -> "ShardedClient":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _call(self, shard: ClientShard, coro: Coroutine) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        outbound = self._outbound.get(loop)
+        if not outbound:
+            outbound = self._outbound[loop] = _Handoff(loop)
+        result = loop.create_future()
+
+        def done(task: asyncio.Task):
+            outbound.put(_copy_result, task, result)
+
+        def cancelled(result: asyncio.Future):
+            if result.cancelled():
+                call.cancel()
+
+        call = shard.submit(coro, done)
+        result.add_done_callback(cancelled)
+        return result
+
+
+async def _request(client: IndyClient, message: dict) -> dict:
+    response = await client.request(message)
+    return await response.result()
+
+
+def _copy_result(task: asyncio.Task, result: asyncio.Future):
+    if task.cancelled():
+        if not result.done():
+            result.cancel()
+        return
+    # always retrieve the exception, so it is not logged as unhandled when
+    # the caller has stopped waiting
+    exc = task.exception()
+    if result.done():
+        return
+    if exc:
+        result.set_exception(exc)
+    else:
+        result.set_result(task.result())
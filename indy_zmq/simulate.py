@@ -0,0 +1,330 @@
+import asyncio
+import json
+import math
+import random
+
+from typing import Callable, List, Sequence, Union
+
+import base58
+
+from .keys import create_server_keys
+from .transport.error import ZmqError
+from .transport.server import ZmqServer
+from .transport.socket import ZmqSocket
+
+# a latency distribution returns a delay in seconds given a random source
+Distribution = Callable[[random.Random], float]
+
+
+def constant(value: float) -> Distribution:
+    return lambda rng: value
+
+
+def uniform(low: float, high: float) -> Distribution:
+    return lambda rng: rng.uniform(low, high)
+
+
+def exponential(mean: float) -> Distribution:
+    return lambda rng: rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+
+
+def lognormal(median: float, sigma: float) -> Distribution:
+    """Long-tailed delays with the given median."""
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+def parse_distribution(spec: Union[None, float, int, list, Distribution]):
+    """Convert a config value into a Distribution.
+
+    Accepts a number (constant), `["uniform", low, high]`,
+    `["exponential", mean]` or `["lognormal", median, sigma]`.
+    """
+    if spec is None:
+        return constant(0.0)
+    if callable(spec):
+        return spec
+    if isinstance(spec, (int, float)):
+        return constant(float(spec))
+    kind, *params = spec
+    factory = {
+        "constant": constant,
+        "uniform": uniform,
+        "exponential": exponential,
+        "lognormal": lognormal,
+    }.get(kind)
+    if not factory:
+        raise ValueError(f"unknown distribution: {kind}")
+    return factory(*params)
+
+
+class NodeBehavior:
+    """Fault and latency settings for a simulated node.
+
+    `ack_latency` and `latency` are the delays before the REQACK and the
+    REPLY. Each request is rejected with a REQNACK with probability
+    `reqnack_rate`, has its REPLY dropped with probability `drop_rate`, or
+    causes the connection to be closed with probability `disconnect_rate`.
+    A `read_delay` before each receive simulates a slow reader. Replies are
+    padded with `reply_size` bytes of data.
+    """
+
+    def __init__(
+        self,
+        *,
+        ack_latency: Union[float, list, Distribution] = None,
+        latency: Union[float, list, Distribution] = None,
+        reqnack_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        disconnect_rate: float = 0.0,
+        read_delay: Union[float, list, Distribution] = None,
+        reply_size: int = 0,
+    ):
+        self.ack_latency = parse_distribution(ack_latency)
+        self.latency = parse_distribution(latency)
+        self.reqnack_rate = reqnack_rate
+        self.drop_rate = drop_rate
+        self.disconnect_rate = disconnect_rate
+        self.read_delay = parse_distribution(read_delay) if read_delay else None
+        self.reply_size = reply_size
+
+    @classmethod
+    def from_config(cls, config: dict) -> "NodeBehavior":
+        return cls(**config)
+
+
+class SimulatedNode:
+    def __init__(
+        self,
+        name: str,
+        host: str,
+        port: int,
+        behavior: NodeBehavior,
+        seed: int = None,
+    ):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.behavior = behavior
+        (self.verkey, _), self.curve_keys = create_server_keys()
+        self.rng = random.Random(seed)
+        self.stats = {
+            "received": 0,
+            "replied": 0,
+            "rejected": 0,
+            "dropped": 0,
+            "disconnected": 0,
+        }
+        self._zmq_server: ZmqServer = None
+        self._server: asyncio.AbstractServer = None
+        # open client connections: the task handling each and its writer
+        self._connections = {}
+        self._tasks = set()
+        self._padding = "x" * behavior.reply_size
+
+    @property
+    def dest(self) -> str:
+        return base58.b58encode(self.verkey).decode("ascii")
+
+    async def start(self):
+        self._zmq_server = ZmqServer(self.handle_connection, self.curve_keys)
+        self._server = await asyncio.start_server(
+            self._handle_client, self.host, self.port
+        )
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stop listening and close all open connections."""
+        server = self._server
+        self._server = None
+        if server:
+            server.close()
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if server:
+            await server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            await self._zmq_server.handle_client(reader, writer)
+        except Exception:
+            if self._server:
+                raise
+            # closed by stop()
+        finally:
+            del self._connections[task]
+
+    async def handle_connection(self, socket: ZmqSocket):
+        behavior = self.behavior
+        tasks = set()
+        try:
+            while True:
+                if behavior.read_delay:
+                    await asyncio.sleep(behavior.read_delay(self.rng))
+                try:
+                    message = await socket.receive()
+                except (ZmqError, OSError):
+                    break
+                if not message:
+                    break
+                self.stats["received"] += 1
+                if self.rng.random() < behavior.disconnect_rate:
+                    self.stats["disconnected"] += 1
+                    break
+                task = asyncio.create_task(self._respond(socket, message))
+                for group in (tasks, self._tasks):
+                    group.add(task)
+                    task.add_done_callback(group.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+            try:
+                await socket.close()
+            except OSError:
+                pass
+
+    async def _respond(self, socket: ZmqSocket, message: bytes):
+        behavior = self.behavior
+        rng = self.rng
+        try:
+            try:
+                request = json.loads(message)
+                req_id = request["reqId"]
+            except (ValueError, KeyError, TypeError):
+                await socket.send(
+                    json.dumps({"op": "REQNACK", "reason": "invalid request"})
+                )
+                return
+            identifier = request.get("identifier")
+            await asyncio.sleep(behavior.ack_latency(rng))
+            if rng.random() < behavior.reqnack_rate:
+                self.stats["rejected"] += 1
+                await socket.send(
+                    json.dumps(
+                        {
+                            "op": "REQNACK",
+                            "reqId": req_id,
+                            "identifier": identifier,
+                            "reason": "simulated rejection",
+                        }
+                    )
+                )
+                return
+            await socket.send(
+                json.dumps({"op": "REQACK", "reqId": req_id, "identifier": identifier})
+            )
+            await asyncio.sleep(behavior.latency(rng))
+            if rng.random() < behavior.drop_rate:
+                self.stats["dropped"] += 1
+                return
+            result = {
+                "reqId": req_id,
+                "identifier": identifier,
+                "type": (request.get("operation") or {}).get("type"),
+                "data": self._padding or None,
+                "seqNo": None,
+                "txnTime": None,
+            }
+            await socket.send(json.dumps({"op": "REPLY", "result": result}))
+            self.stats["replied"] += 1
+        except (ZmqError, OSError):
+            # connection closed while responding
+            pass
+
+
+class SimulatedPool:
+    """Run a number of simulated Indy nodes within the current event loop.
+
+    `behaviors` may be a single NodeBehavior shared by all nodes, or one per
+    node. Ports are allocated automatically unless `base_port` is given, in
+    which case node N listens for clients on `base_port + 2 * N + 1`, with
+    the (unused) node port below it, following the usual pool layout.
+    """
+
+    def __init__(
+        self,
+        count: int = 4,
+        behaviors: Union[NodeBehavior, Sequence[NodeBehavior]] = None,
+        *,
+        host: str = "127.0.0.1",
+        base_port: int = None,
+        seed: int = None,
+    ):
+        if behaviors is None or isinstance(behaviors, NodeBehavior):
+            behaviors = [behaviors or NodeBehavior()] * count
+        if len(behaviors) != count:
+            raise ValueError("expected one behavior per node")
+        self.host = host
+        self.nodes: List[SimulatedNode] = [
+            SimulatedNode(
+                f"Node{idx + 1}",
+                host,
+                base_port + 2 * idx + 1 if base_port else 0,
+                behavior,
+                None if seed is None else seed + idx,
+            )
+            for idx, behavior in enumerate(behaviors)
+        ]
+
+    async def start(self) -> "SimulatedPool":
+        for node in self.nodes:
+            await node.start()
+        return self
+
+    async def stop(self):
+        for node in self.nodes:
+            await node.stop()
+
+    async def __aenter__(self) -> "SimulatedPool":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    def genesis_transactions(self) -> List[dict]:
+        """Generate pool genesis NODE transactions for the running nodes.
+
+        No BLS keys are included, so clients must not require state proofs.
+        """
+        txns = []
+        for idx, node in enumerate(self.nodes):
+            steward = base58.b58encode(node.verkey[:16]).decode("ascii")
+            txns.append(
+                {
+                    "reqSignature": {},
+                    "txn": {
+                        "data": {
+                            "data": {
+                                "alias": node.name,
+                                "client_ip": node.host,
+                                "client_port": node.port,
+                                "node_ip": node.host,
+                                "node_port": node.port - 1,
+                                "services": ["VALIDATOR"],
+                            },
+                            "dest": node.dest,
+                        },
+                        "metadata": {"from": steward},
+                        "type": "0",
+                    },
+                    "txnMetadata": {"seqNo": idx + 1},
+                    "ver": "1",
+                }
+            )
+        return txns
+
+    def genesis(self) -> str:
+        return "\n".join(json.dumps(txn) for txn in self.genesis_transactions())
+
+    @property
+    def stats(self) -> dict:
+        return {node.name: dict(node.stats) for node in self.nodes}
@@ -0,0 +1,88 @@
+from bisect import bisect_left
+from typing import Sequence
+
+# upper bounds in seconds, roughly 1-2-5 steps from 100us to 60s
+DEFAULT_BOUNDS = (
+    0.0001,
+    0.0002,
+    0.0005,
+    0.001,
+    0.002,
+    0.005,
+    0.01,
+    0.02,
+    0.05,
+    0.1,
+    0.2,
+    0.5,
+    1.0,
+    2.0,
+    5.0,
+    10.0,
+    20.0,
+    60.0,
+)
+
+TRACE_PHASES = ("queue", "ack", "reply", "total")
+
+
+class LatencyHistogram:
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS):
+        self.bounds = tuple(bounds)
+        # final bucket collects values above the last bound
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket containing quantile `q`."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return self.bounds[idx] if idx < len(self.bounds) else self.max
+        return self.max
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"<LatencyHistogram count={self.count} mean={self.mean:.6f}"
+            f" p99={self.quantile(0.99):.6f} max={self.max:.6f}>"
+        )
+
+
+class ClientLatency:
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS):
+        self.phases = {phase: LatencyHistogram(bounds) for phase in TRACE_PHASES}
+
+    def __getitem__(self, phase: str) -> LatencyHistogram:
+        return self.phases[phase]
+
+    def record(self, response):
+        phases = self.phases
+        for phase, elapsed in response.timings.items():
+            phases[phase].add(elapsed)
+
+    def reset(self):
+        for hist in self.phases.values():
+            hist.reset()
@@ -1,8 +1,17 @@
 import asyncio
 import os
 
+from typing import Sequence
+
 import libnacl as nacl
 
+from .compress import (
+    DEFAULT_MAX_MESSAGE_SIZE,
+    DEFAULT_THRESHOLD,
+    available_compression,
+    compression_metadata,
+    negotiate_compression,
+)
 from .error import ConnectionError, ZmqError
 from .socket import ZmqSocket
 from .util import (
@@ -16,8 +25,20 @@ from .z85 import z85_encode
 
 
 class ZmqClient:
-    def __init__(self, keypair=None):
+    def __init__(
+        self,
+        keypair=None,
+        *,
+        compression: Sequence[str] = None,
+        compress_threshold: int = DEFAULT_THRESHOLD,
+        max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE,
+    ):
         self.ident_pk, self.ident_sk = keypair or nacl.crypto_box_keypair()
+        self.compression = (
+            available_compression() if compression is None else compression
+        )
+        self.compress_threshold = compress_threshold
+        self.max_message_size = max_message_size
 
     async def connect(self, host: str, port: int, curve_pk: bytes = None) -> ZmqSocket:
         reader, writer = await asyncio.open_connection(host, port)
@@ -101,7 +122,11 @@ class ZmqClient:
         )
         vouch = vouch_nonce + vouch_box
         metadata = encode_metadata(
-            {"Socket-Type": "DEALER", "Identity": z85_encode(self.ident_pk)}
+            {
+                "Socket-Type": "DEALER",
+                "Identity": z85_encode(self.ident_pk),
+                **compression_metadata(self.compression),
+            }
         )
         xkey = nacl.crypto_box_beforenm(server_eph_pk, ephemeral_sk)
         # fixed nonce value (1) - counter is used for message nonces
@@ -137,7 +162,16 @@ class ZmqClient:
             raise ConnectionError("decryption error in ready") from None
         meta = decode_metadata(ready_meta)
 
-        socket = ZmqSocket(reader, writer, meta, xkey, False)
+        socket = ZmqSocket(
+            reader,
+            writer,
+            meta,
+            xkey,
+            False,
+            compression=negotiate_compression(self.compression, meta),
+            compress_threshold=self.compress_threshold,
+            max_message_size=self.max_message_size,
+        )
         ident = socket.remote_identity
         if ident and ident != curve_pk:
             raise ConnectionError("server identity mismatch")
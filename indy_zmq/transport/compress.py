@@ -0,0 +1,100 @@
+import zlib
+
+from typing import Callable, Dict, List, Sequence
+
+from .error import ZmqError
+
+try:
+    from compression import zstd as _zstd  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard as _zstd
+    except ImportError:
+        _zstd = None
+
+# metadata property advertising the supported algorithms, in order of preference
+COMPRESSION_PROPERTY = b"X-Compression"
+# message flag bits (alongside the MORE flag) indicating a compressed payload
+COMPRESSION_MASK = 0xC0
+DEFAULT_THRESHOLD = 1024
+# upper bound on the size of a decompressed message
+DEFAULT_MAX_MESSAGE_SIZE = 16 << 20
+
+
+class Codec:
+    def __init__(
+        self,
+        name: str,
+        flag: int,
+        compress: Callable[[bytes], bytes],
+        decompress: Callable[[bytes, int], bytes],
+    ):
+        self.name = name
+        self.flag = flag
+        self.compress = compress
+        self.decompress = decompress
+
+    def __repr__(self) -> str:
+        return f"<Codec {self.name}>"
+
+
+def _zlib_decompress(data: bytes, max_size: int) -> bytes:
+    decomp = zlib.decompressobj()
+    result = decomp.decompress(data, max_size + 1)
+    if len(result) > max_size:
+        raise ZmqError("decompressed message too large")
+    if not decomp.eof:
+        raise ZmqError("truncated compressed message")
+    return result
+
+
+def _zstd_decompress(data: bytes, max_size: int) -> bytes:
+    # a new decompressor per call, as sockets may be used from several threads
+    if _zstd.__name__ == "compression.zstd":
+        decomp = _zstd.ZstdDecompressor()
+        result = decomp.decompress(data, max_size + 1)
+        truncated = not decomp.eof
+    else:
+        # zstandard: the reader bounds the output regardless of the frame header
+        with _zstd.ZstdDecompressor().stream_reader(data) as reader:
+            result = reader.read(max_size + 1)
+        truncated = False
+    if len(result) > max_size:
+        raise ZmqError("decompressed message too large")
+    if truncated:
+        raise ZmqError("truncated compressed message")
+    return result
+
+
+CODECS: Dict[str, Codec] = {}
+
+if _zstd:
+    # module-level function, as sockets may be used from several threads
+    CODECS["zstd"] = Codec("zstd", 0x80, _zstd.compress, _zstd_decompress)
+
+CODECS["zlib"] = Codec(
+    "zlib", 0x40, lambda data: zlib.compress(data, 1), _zlib_decompress
+)
+
+
+def available_compression() -> Sequence[str]:
+    return tuple(CODECS)
+
+
+def compression_metadata(names: Sequence[str]) -> dict:
+    if not names:
+        return {}
+    return {COMPRESSION_PROPERTY: ",".join(names)}
+
+
+def negotiate_compression(names: Sequence[str], meta: dict) -> List[Codec]:
+    """List the algorithms supported by both sides, in local preference order.
+
+    The first is used for outgoing messages, and incoming messages may use
+    any of them.
+    """
+    remote = meta.get(COMPRESSION_PROPERTY)
+    if not names or not remote:
+        return []
+    remote = set(remote.decode("ascii", "ignore").split(","))
+    return [CODECS[name] for name in names if name in remote and name in CODECS]
@@ -0,0 +1,106 @@
+import asyncio
+
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Union
+
+from .error import ZmqError
+from .socket import ZmqSocket
+
+Replies = Union[None, bytes, str, Iterable[Union[bytes, str]]]
+
+
+class MessageDispatcher:
+    """A ZmqServer connection handler which processes messages concurrently.
+
+    `handler` is invoked once per received message and returns the replies
+    to send: None, a single message, or a sequence of messages. It should be
+    a coroutine function unless `executor` is provided, in which case it must
+    be a plain (picklable, for a process pool) function accepting the raw
+    message bytes.
+
+    Up to `concurrency` messages are processed at once for each connection.
+    When `ordered` is set, replies are sent in the order the requests were
+    received; otherwise they are sent as each handler completes.
+    """
+
+    def __init__(
+        self,
+        handler: Callable,
+        *,
+        concurrency: int = 16,
+        ordered: bool = True,
+        executor: Executor = None,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.handler = handler
+        self.concurrency = concurrency
+        self.ordered = ordered
+        self.executor = executor
+
+    async def __call__(self, socket: ZmqSocket):
+        limit = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        prev: asyncio.Task = None
+        try:
+            while True:
+                await limit.acquire()
+                message = await socket.receive()
+                if not message:
+                    limit.release()
+                    break
+                task = asyncio.create_task(
+                    self._dispatch(socket, message, limit, prev)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                if self.ordered:
+                    prev = task
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _dispatch(
+        self,
+        socket: ZmqSocket,
+        message: bytes,
+        limit: asyncio.Semaphore,
+        prev: asyncio.Task,
+    ):
+        try:
+            replies = await invoke_handler(self.handler, self.executor, message)
+            if prev:
+                # wait for the preceding replies to be sent, ignoring failures
+                await asyncio.wait((prev,))
+            await send_replies(socket, replies)
+        finally:
+            limit.release()
+
+
+async def invoke_handler(
+    handler: Callable, executor: Executor, message: bytes
+) -> Replies:
+    """Run a message handler, reporting and discarding any exception."""
+    try:
+        if executor:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, handler, message)
+        return await handler(message)
+    except Exception as ex:
+        print("handler error:", repr(ex))
+        return None
+
+
+async def send_replies(socket: ZmqSocket, replies: Replies):
+    if replies is None:
+        return
+    if isinstance(replies, (bytes, str)):
+        replies = (replies,)
+    try:
+        for reply in replies:
+            await socket.send(reply)
+    except (ZmqError, OSError):
+        # the connection was closed, which the receive loop will handle
+        pass
@@ -0,0 +1,164 @@
+import asyncio
+
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Dict, Sequence
+
+from .dispatch import invoke_handler, send_replies
+from .socket import ZmqSocket
+
+
+class Lane:
+    """A class of requests with its own concurrency limit.
+
+    Lanes are listed in priority order: when handler slots are free, queued
+    messages in earlier lanes are started first.
+    """
+
+    def __init__(self, name: str, concurrency: int = 16):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.name = name
+        self.concurrency = concurrency
+        self.running = 0
+        # connection queues with messages waiting, in round-robin order
+        self.active: deque = deque()
+
+    def __repr__(self) -> str:
+        return f"<Lane {self.name} running={self.running} waiting={len(self.active)}>"
+
+
+class _Connection:
+    def __init__(self, socket: ZmqSocket, weight: int):
+        self.socket = socket
+        self.weight = weight
+        self.pending = 0
+        self.closed = False
+        self.queues: Dict[str, "_ConnectionQueue"] = {}
+        self.ready = asyncio.Event()
+        self.ready.set()
+
+
+class _ConnectionQueue:
+    __slots__ = ("conn", "messages", "deficit")
+
+    def __init__(self, conn: _Connection):
+        self.conn = conn
+        self.messages = deque()
+        self.deficit = 0
+
+
+class FairScheduler:
+    """A ZmqServer connection handler which shares handler capacity fairly.
+
+    Messages from every connection are queued per connection and lane, and
+    started by deficit round-robin: within a lane each connection may start
+    up to `weight(socket)` messages per turn (1 by default), so a single busy
+    client cannot starve the others. `classify(message)` selects the lane
+    name for each message, defaulting to the first lane.
+
+    At most `concurrency` handlers run in total, and each lane is further
+    limited to its own `Lane.concurrency`. Each connection may have up to
+    `max_pending` messages queued or running before reading from it pauses.
+
+    The `handler` and `executor` arguments follow MessageDispatcher. Replies
+    are sent as each handler completes.
+    """
+
+    def __init__(
+        self,
+        handler: Callable,
+        *,
+        lanes: Sequence[Lane] = None,
+        classify: Callable[[bytes], str] = None,
+        weight: Callable[[ZmqSocket], int] = None,
+        concurrency: int = 64,
+        max_pending: int = 64,
+        executor: Executor = None,
+    ):
+        self.handler = handler
+        self.lanes = list(lanes) if lanes else [Lane("default", concurrency)]
+        self._lanes = {lane.name: lane for lane in self.lanes}
+        if len(self._lanes) != len(self.lanes):
+            raise ValueError("duplicate lane name")
+        self.classify = classify
+        self.weight = weight
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.executor = executor
+        self.running = 0
+        self._tasks = set()
+
+    async def __call__(self, socket: ZmqSocket):
+        conn = _Connection(socket, max(1, self.weight(socket)) if self.weight else 1)
+        try:
+            while True:
+                await conn.ready.wait()
+                message = await socket.receive()
+                if not message:
+                    break
+                self._enqueue(conn, message)
+        finally:
+            self._close(conn)
+
+    def _enqueue(self, conn: _Connection, message: bytes):
+        lane = self._lanes.get(self.classify(message)) if self.classify else None
+        if not lane:
+            lane = self.lanes[0]
+        queue = conn.queues.get(lane.name)
+        if not queue:
+            queue = conn.queues[lane.name] = _ConnectionQueue(conn)
+        if not queue.messages:
+            lane.active.append(queue)
+        queue.messages.append(message)
+        conn.pending += 1
+        if conn.pending >= self.max_pending:
+            conn.ready.clear()
+        self._schedule()
+
+    def _close(self, conn: _Connection):
+        conn.closed = True
+        for name, queue in conn.queues.items():
+            if queue.messages:
+                conn.pending -= len(queue.messages)
+                queue.messages.clear()
+                self._lanes[name].active.remove(queue)
+
+    def _schedule(self):
+        for lane in self.lanes:
+            active = lane.active
+            while (
+                active
+                and self.running < self.concurrency
+                and lane.running < lane.concurrency
+            ):
+                queue = active[0]
+                if queue.deficit <= 0:
+                    queue.deficit += queue.conn.weight
+                message = queue.messages.popleft()
+                queue.deficit -= 1
+                if not queue.messages:
+                    active.popleft()
+                    queue.deficit = 0
+                elif queue.deficit <= 0:
+                    active.rotate(-1)
+                self.running += 1
+                lane.running += 1
+                task = asyncio.create_task(self._run(lane, queue.conn, message))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            if self.running >= self.concurrency:
+                break
+
+    async def _run(self, lane: Lane, conn: _Connection, message: bytes):
+        try:
+            replies = await invoke_handler(self.handler, self.executor, message)
+            if not conn.closed:
+                await send_replies(conn.socket, replies)
+        finally:
+            self.running -= 1
+            lane.running -= 1
+            conn.pending -= 1
+            if conn.pending < self.max_pending:
+                conn.ready.set()
+            self._schedule()
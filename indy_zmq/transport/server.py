@@ -1,10 +1,17 @@
 import asyncio
 import os
 
-from typing import Callable
+from typing import Callable, Sequence
 
 import libnacl as nacl
 
+from .compress import (
+    DEFAULT_MAX_MESSAGE_SIZE,
+    DEFAULT_THRESHOLD,
+    available_compression,
+    compression_metadata,
+    negotiate_compression,
+)
 from .error import ConnectionError, ZmqError
 from .socket import ZmqSocket
 from .util import (
@@ -18,9 +25,22 @@ from .z85 import z85_encode
 
 
 class ZmqServer:
-    def __init__(self, handler: Callable, keypair=None):
+    def __init__(
+        self,
+        handler: Callable,
+        keypair=None,
+        *,
+        compression: Sequence[str] = None,
+        compress_threshold: int = DEFAULT_THRESHOLD,
+        max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE,
+    ):
         self.handler = handler
         self.ident_pk, self.ident_sk = keypair or nacl.crypto_box_keypair()
+        self.compression = (
+            available_compression() if compression is None else compression
+        )
+        self.compress_threshold = compress_threshold
+        self.max_message_size = max_message_size
 
     async def handle_client(
         self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
@@ -129,7 +149,11 @@ class ZmqServer:
         # FIXME check identity in metadata
 
         metadata = encode_metadata(
-            {b"Socket-Type": "ROUTER", b"Identity": z85_encode(self.ident_pk)}
+            {
+                b"Socket-Type": "ROUTER",
+                b"Identity": z85_encode(self.ident_pk),
+                **compression_metadata(self.compression),
+            }
         )
         ready = MessageBuilder(30 + len(metadata))
         ready_nonce = b"CurveZMQREADY---\x00\x00\x00\x00\x00\x00\x00\x01"
@@ -141,7 +165,16 @@ class ZmqServer:
         writer.write(ready)
         await writer.drain()
 
-        socket = ZmqSocket(reader, writer, client_metadata, xkey, True)
+        socket = ZmqSocket(
+            reader,
+            writer,
+            client_metadata,
+            xkey,
+            True,
+            compression=negotiate_compression(self.compression, client_metadata),
+            compress_threshold=self.compress_threshold,
+            max_message_size=self.max_message_size,
+        )
         ident = socket.remote_identity
         if ident and ident != client_pk:
             raise ConnectionError("client identity mismatch")
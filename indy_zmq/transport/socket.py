@@ -1,15 +1,32 @@
 import asyncio
 
-from typing import Union
+from collections import deque
+from typing import Sequence, Union
 
 import libnacl as nacl
 
+from .compress import (
+    COMPRESSION_MASK,
+    DEFAULT_MAX_MESSAGE_SIZE,
+    DEFAULT_THRESHOLD,
+    Codec,
+)
 from .error import ConnectionError, ZmqError
-from .util import MessageBuilder, enc_frame_length, read_message
+from .sodium import (
+    HAS_EASY,
+    MACBYTES,
+    SodiumBuffer,
+    box_in_place,
+    box_open_into,
+    buffer_for,
+)
+from .util import MessageBuilder, enc_frame_length, frame_header, read_message
 from .z85 import z85_decode
 
 CLIENT_NONCE = b"CurveZMQMESSAGEC"
 SERVER_NONCE = b"CurveZMQMESSAGES"
+# number of flushed send buffers kept for reuse
+SEND_POOL_SIZE = 4
 
 
 class ZmqSocket:
@@ -20,6 +37,10 @@ class ZmqSocket:
         meta: dict,
         xkey: bytes,
         server: bool,
+        *,
+        compression: Sequence[Codec] = (),
+        compress_threshold: int = DEFAULT_THRESHOLD,
+        max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE,
     ):
         self._reader = reader
         self._writer = writer
@@ -27,6 +48,20 @@ class ZmqSocket:
         self._xkey = xkey
         self._nonce = 2
         self._server = server
+        # negotiated codecs: the first is used for outgoing messages at or
+        # above the threshold, and incoming messages may use any of them
+        self._compression = compression[0] if compression else None
+        self._decoders = {codec.flag: codec for codec in compression}
+        self._compress_threshold = compress_threshold
+        self._max_message_size = max_message_size
+        self._recv_buf: SodiumBuffer = None
+        # send buffers free for reuse, and those passed to the transport
+        # along with the length of the frame written from each
+        self._send_pool = []
+        self._send_queued = deque()
+        # optional TrafficRecorder, passed the decrypted request payloads
+        # (messages received by a server socket, or sent by a client socket)
+        self.recorder = None
 
     @property
     def remote_metadata(self) -> dict:
@@ -39,11 +74,26 @@ class ZmqSocket:
             ident = z85_decode(ident)
         return ident
 
+    @property
+    def compression(self) -> Codec:
+        return self._compression
+
     @property
     def remote_socket_type(self) -> bytes:
         self._meta.get(b"Socket-Type")
 
     async def receive(self) -> bytes:
+        message = await self.receive_view()
+        if message is None:
+            return None
+        return message.tobytes()
+
+    async def receive_view(self) -> memoryview:
+        """Receive the next message without copying the decrypted payload.
+
+        The result is only valid until the next call to `receive` or
+        `receive_view`.
+        """
         parts = None
         while True:
             try:
@@ -60,41 +110,154 @@ class ZmqSocket:
                 return None
             if len(body) < 33 or body[:8] != b"\x07MESSAGE":
                 raise ConnectionError("invalid response message")
-            nonce = (CLIENT_NONCE if self._server else SERVER_NONCE) + body[8:16]
-            message_plain = nacl.crypto_box_open_afternm(body[16:], nonce, self._xkey)
-            more = message_plain[0] & 1
+            message_plain = self._open(body)
+            flags = message_plain[0]
+            more = flags & 1
             message_plain = message_plain[1:]
-            if more:
+            if flags & COMPRESSION_MASK:
+                message_plain = memoryview(self._decompress(flags, message_plain))
+            if more or parts:
                 if not parts:
-                    parts = [message_plain]
+                    parts = [message_plain.tobytes()]
                 else:
-                    parts.append(message_plain)
+                    parts.append(message_plain.tobytes())
+                if not more:
+                    message = memoryview(b"".join(parts))
+                    break
             else:
-                if parts:
-                    parts.append(message_plain)
-                    return b"".join(parts)
-                else:
-                    return message_plain
+                message = message_plain
+                break
+        if self.recorder and self._server:
+            self.recorder.record(message)
+        return message
 
     async def send(self, message: Union[str, bytes]):
-        if not self._writer:
+        await self.drain()
+        self.write(message)
+
+    def write(self, message: Union[str, bytes]):
+        """Encrypt a message and hand it to the transport without waiting.
+
+        Call `drain` beforehand so that frames are not queued on the transport
+        faster than it can send them.
+        """
+        if not self._writer or self._writer.is_closing():
             raise ConnectionError("disconnected")
         if isinstance(message, str):
             message = message.encode("utf-8")
+        if self.recorder and not self._server:
+            self.recorder.record(message)
         message_nonce = self._nonce.to_bytes(8, "big")
         self._nonce += 1
         nonce = (SERVER_NONCE if self._server else CLIENT_NONCE) + message_nonce
-        message_data = bytearray(len(message) + 1)
-        message_data[1:] = message
-        message_box = nacl.crypto_box_afternm(message_data, bytes(nonce), self._xkey)
-        message = MessageBuilder(32 + len(message))
-        message.write(b"\x07MESSAGE")
-        message.write(message_nonce)
-        message.write(message_box)
-        message = message.complete()
-        self._writer.write(enc_frame_length(message, command=False))
-        self._writer.write(message)
+        flags = 0
+        codec = self._compression
+        if codec and len(message) >= self._compress_threshold:
+            packed = codec.compress(message)
+            if len(packed) < len(message):
+                message = packed
+                flags = codec.flag
+        if HAS_EASY:
+            self._writer.write(self._seal(message, flags, message_nonce, nonce))
+        else:
+            message_data = bytearray(len(message) + 1)
+            message_data[0] = flags
+            message_data[1:] = message
+            message_box = nacl.crypto_box_afternm(message_data, nonce, self._xkey)
+            message = MessageBuilder(32 + len(message))
+            message.write(b"\x07MESSAGE")
+            message.write(message_nonce)
+            message.write(message_box)
+            message = message.complete()
+            self._writer.write(enc_frame_length(message, command=False))
+            self._writer.write(message)
+
+    async def drain(self):
+        """Wait until the transport's write buffer is below its high-water mark."""
+        if not self._writer:
+            raise ConnectionError("disconnected")
+        transport = self._writer.transport
+        high = transport.get_write_buffer_limits()[1]
         await self._writer.drain()
+        # all waiting writers are resumed together, so check again in case
+        # another has already refilled the buffer
+        while (
+            transport.get_write_buffer_size() > high and not transport.is_closing()
+        ):
+            await self._writer.drain()
+        self._reclaim()
+
+    def _open(self, body: bytes) -> memoryview:
+        nonce = (CLIENT_NONCE if self._server else SERVER_NONCE) + body[8:16]
+        if HAS_EASY:
+            self._recv_buf = buffer_for(self._recv_buf, len(body) - 16 - MACBYTES)
+            return box_open_into(self._recv_buf, body, 16, nonce, self._xkey)
+        return memoryview(nacl.crypto_box_open_afternm(body[16:], nonce, self._xkey))
+
+    def _decompress(self, flags: int, message: memoryview) -> bytes:
+        codec = self._decoders.get(flags & COMPRESSION_MASK)
+        if not codec:
+            raise ConnectionError("unsupported message compression")
+        try:
+            return codec.decompress(message, self._max_message_size)
+        except ZmqError as ex:
+            raise ConnectionError(str(ex)) from None
+        except Exception:
+            raise ConnectionError("invalid compressed message") from None
+
+    def _seal(
+        self, message: bytes, flags: int, message_nonce: bytes, nonce: bytes
+    ) -> memoryview:
+        # frame header, command name and nonce, followed by the boxed message
+        # (MAC, flags byte and payload), all encrypted in place in one buffer
+        mlen = len(message) + 1
+        bodylen = 32 + mlen
+        header = frame_header(bodylen, command=False)
+        pos = len(header)
+        total = pos + bodylen
+        buf = self._acquire(total)
+        data = buf.data
+        data[:pos] = header
+        data[pos : pos + 8] = b"\x07MESSAGE"
+        data[pos + 8 : pos + 16] = message_nonce
+        data[pos + 16 + MACBYTES] = flags
+        data[pos + 17 + MACBYTES : total] = message
+        box_in_place(buf, pos + 16, mlen, nonce, self._xkey)
+        self._send_queued.append((buf, total))
+        return memoryview(data)[:total]
+
+    def _acquire(self, size: int) -> SodiumBuffer:
+        self._reclaim()
+        pool = self._send_pool
+        best = None
+        for idx, buf in enumerate(pool):
+            if buf.size >= size and (best is None or buf.size < pool[best].size):
+                best = idx
+        if best is None:
+            return buffer_for(None, size)
+        return pool.pop(best)
+
+    def _reclaim(self):
+        # the transport may hold views of written frames until they are sent;
+        # as it sends in order, only the most recent frames covering the bytes
+        # still buffered can be in use
+        queued = self._send_queued
+        if not queued or not self._writer:
+            return
+        pending = self._writer.transport.get_write_buffer_size()
+        held = keep = 0
+        for _, size in reversed(queued):
+            if held >= pending:
+                break
+            held += size
+            keep += 1
+        pool = self._send_pool
+        while len(queued) > keep:
+            pool.append(queued.popleft()[0])
+        if len(pool) > SEND_POOL_SIZE:
+            # keep the largest buffers
+            pool.sort(key=lambda buf: buf.size, reverse=True)
+            del pool[SEND_POOL_SIZE:]
 
     async def close(self):
         if self._writer:
@@ -0,0 +1,71 @@
+import ctypes
+
+import libnacl as nacl
+
+MACBYTES = nacl.crypto_box_MACBYTES
+
+try:
+    _box_easy_afternm = nacl.nacl.crypto_box_easy_afternm
+    _box_open_easy_afternm = nacl.nacl.crypto_box_open_easy_afternm
+    HAS_EASY = True
+except AttributeError:
+    _box_easy_afternm = _box_open_easy_afternm = None
+    HAS_EASY = False
+
+
+class SodiumBuffer:
+    """A reusable bytearray which may be passed directly to libsodium."""
+
+    def __init__(self, size: int):
+        self.data = bytearray(size)
+        self._ref = (ctypes.c_char * size).from_buffer(self.data)
+        self.size = size
+
+    def ptr(self, offset: int = 0):
+        return ctypes.byref(self._ref, offset)
+
+
+def buffer_for(buf: SodiumBuffer, size: int) -> SodiumBuffer:
+    if buf and buf.size >= size:
+        return buf
+    # round up to a whole number of pages
+    return SodiumBuffer((size + 4095) & ~4095)
+
+
+def box_in_place(
+    buf: SodiumBuffer, offset: int, mlen: int, nonce: bytes, xkey: bytes
+):
+    """Encrypt `mlen` bytes located at `offset + MACBYTES` within the buffer.
+
+    The MAC and ciphertext are written starting at `offset`.
+    """
+    ret = _box_easy_afternm(
+        buf.ptr(offset),
+        buf.ptr(offset + MACBYTES),
+        ctypes.c_ulonglong(mlen),
+        nonce,
+        xkey,
+    )
+    if ret:
+        raise nacl.CryptError("Unable to encrypt message")
+
+
+def box_open_into(
+    buf: SodiumBuffer, cipher: bytes, offset: int, nonce: bytes, xkey: bytes
+) -> memoryview:
+    """Decrypt `cipher[offset:]` into the buffer, returning a view of the result.
+
+    The view is only valid until the buffer is reused.
+    """
+    if not isinstance(cipher, bytes):
+        cipher = bytes(cipher)
+    clen = len(cipher) - offset
+    if clen < MACBYTES:
+        raise nacl.CryptError("Unable to decrypt ciphertext")
+    src = ctypes.cast(ctypes.c_char_p(cipher), ctypes.c_void_p).value + offset
+    ret = _box_open_easy_afternm(
+        buf.ptr(), ctypes.c_void_p(src), ctypes.c_ulonglong(clen), nonce, xkey
+    )
+    if ret:
+        raise nacl.CryptError("Unable to decrypt ciphertext")
+    return memoryview(buf.data)[: clen - MACBYTES]
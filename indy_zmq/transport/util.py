@@ -6,7 +6,10 @@ from .error import ZmqError
 
 
 def enc_frame_length(body: bytes, *, command: bool) -> bytes:
-    bodylen = len(body)
+    return frame_header(len(body), command=command)
+
+
+def frame_header(bodylen: int, *, command: bool) -> bytes:
     flags = 4 if command else 0
     if bodylen <= 255:
         return bytes((flags, bodylen))
@@ -14,30 +17,26 @@ def enc_frame_length(body: bytes, *, command: bool) -> bytes:
 
 
 async def read_message(reader: asyncio.StreamReader, *, command: bool):
-    bodylen = await reader.read(2)
-    if not bodylen:
-        return b""
-    if len(bodylen) != 2:
-        raise ZmqError("disconnected")
+    try:
+        bodylen = await reader.readexactly(2)
+    except asyncio.IncompleteReadError as ex:
+        if not ex.partial:
+            return b""
+        raise ZmqError("disconnected") from None
     is_cmd = bodylen[0] & 4 != 0
     if is_cmd != command:
         raise ZmqError("invalid command flag")
     is_long = bodylen[0] & 2 != 0
-    if is_long:
-        lenbuf = bytearray(8)
-        lenbuf[0] = bodylen[1]
-        bodylen_ext = await reader.read(7)
-        if len(bodylen_ext) != 7:
-            raise ZmqError("disconnected")
-        lenbuf[1:] = bodylen_ext
-        bodylen = int.from_bytes(lenbuf, "big")
-        # FIXME reasonable limit on length?
-    else:
-        bodylen = bodylen[1]
-    body = await reader.read(bodylen)
-    if len(body) != bodylen:
-        raise ZmqError("disconnected")
-    return body
+    try:
+        if is_long:
+            bodylen_ext = await reader.readexactly(7)
+            bodylen = int.from_bytes(bodylen[1:] + bodylen_ext, "big")
+            # FIXME reasonable limit on length?
+        else:
+            bodylen = bodylen[1]
+        return await reader.readexactly(bodylen)
+    except asyncio.IncompleteReadError:
+        raise ZmqError("disconnected") from None
 
 
 def encode_metadata(metadata: dict) -> bytes: